@@ -12,6 +12,139 @@ import re
 
 
 class GuangzhouWeatherCrawler:
+    # 选择器在每次调用间保持不变，定义为类常量避免重复构建
+    TABLE_SELECTORS = (
+        "table.history-table",
+        "table",
+        ".box-mod-tb table",
+        "tbody table"
+    )
+    PREV_BUTTON_SELECTORS = (
+        "#js_prevMonth",
+        "a[onclick*='上一月']",
+        "a:contains('上一月')"
+    )
+    NEXT_BUTTON_SELECTORS = (
+        "#js_nextMonth",
+        "a[onclick*='下一月']",
+        "a:contains('下一月')"
+    )
+
+    # 与Selenium的is_displayed()保持一致：元素有布局盒（排除display:none，包含position:fixed）
+    # 且visibility不是hidden
+    IS_VISIBLE_JS = """
+        const isVisible = el => el.getClientRects().length > 0 && getComputedStyle(el).visibility !== 'hidden';
+    """
+
+    # 页面所有表格的文本，用于判断翻页后内容是否已更新
+    TABLE_SIGNATURE_JS = """
+        const tableSignature = () => Array.from(document.getElementsByTagName('table'), t => t.innerText).join('\\n');
+    """
+
+    # 翻页后判断表格是否已更新：表格文本非空且与点击前不同（依赖 TABLE_SIGNATURE_JS）
+    TABLE_CHANGED_JS = """
+        const tableChanged = before => {
+            const now = tableSignature();
+            return !!now && now !== before;
+        };
+    """
+
+    # 等待表格更新的超时时间（秒），浏览器内回退和逐次点击共用
+    TABLE_CHANGE_TIMEOUT = 10
+
+    # 按选择器顺序查找翻页按钮（依赖 IS_VISIBLE_JS）：checkNoData时遇到带no-data-btn类的按钮
+    # 返回'no-data'，否则返回第一个可见且可用的按钮。返回 {status: 'found' | 'no-data' | 'not-found', el}
+    FIND_BUTTON_JS = """
+        const findButton = (selectors, checkNoData) => {
+            for (const sel of selectors) {
+                let el = null;
+                try { el = document.querySelector(sel); } catch (e) { continue; }
+                if (!el) continue;
+                if (checkNoData && (el.getAttribute('class') || '').includes('no-data-btn')) {
+                    return {status: 'no-data', el: null};
+                }
+                if (!isVisible(el) || el.disabled) continue;
+                return {status: 'found', el: el};
+            }
+            return {status: 'not-found', el: null};
+        };
+    """
+
+    # 一次性读取表格所有单元格文本，避免每个单元格一次WebDriver往返。
+    # 返回 {fallback: 是否退回到第一个table, rows: [[单元格文本...], ...]}，页面没有表格时rows为null
+    TABLE_TEXT_SCRIPT = IS_VISIBLE_JS + """
+        const selectors = arguments[0];
+        let table = null, fallback = false;
+        for (const sel of selectors) {
+            let tables = [];
+            try { tables = document.querySelectorAll(sel); } catch (e) { continue; }
+            table = Array.from(tables).find(isVisible) || null;
+            if (table) break;
+        }
+        if (!table) {
+            table = document.getElementsByTagName('table')[0] || null;
+            fallback = true;
+        }
+        if (!table) return {fallback: fallback, rows: null};
+        const rows = Array.from(table.getElementsByTagName('tr')).map(
+            tr => Array.from(tr.getElementsByTagName('td')).map(td => td.innerText || ''));
+        return {fallback: fallback, rows: rows};
+    """
+
+    # 在浏览器内连续点击上一月按钮，避免每次点击都走一次WebDriver往返。
+    # 每次点击后用与 wait_for_table_change 相同的 tableChanged 判断和超时等待表格更新，超时即停止。
+    # 点击次数同步写入sessionStorage（每次调用使用独立的key），脚本中途失效（如页面跳转、超时）
+    # 时可以读回；正常结束时删除该key。
+    # 返回 {clicked: 已点击次数, started: 是否找到过按钮, timedOut: 是否等待超时, error: 是否出错}
+    REWIND_SCRIPT = IS_VISIBLE_JS + TABLE_SIGNATURE_JS + TABLE_CHANGED_JS + FIND_BUTTON_JS + """
+        const selectors = arguments[0], count = arguments[1], key = arguments[2], stepTimeoutMs = arguments[3];
+        const done = arguments[arguments.length - 1];
+        const pollMs = 100;
+        const waitChange = before => new Promise(resolve => {
+            const startedAt = Date.now();
+            const timer = setInterval(() => {
+                if (tableChanged(before)) {
+                    clearInterval(timer);
+                    resolve(true);
+                } else if (Date.now() - startedAt >= stepTimeoutMs) {
+                    clearInterval(timer);
+                    resolve(false);
+                }
+            }, pollMs);
+        });
+        let clicked = 0;
+        const finish = result => { sessionStorage.removeItem(key); done(result); };
+        sessionStorage.setItem(key, '0');
+        (async () => {
+            for (let i = 0; i < count; i++) {
+                if (window[key + ':stop']) break;
+                const button = findButton(selectors, false).el;
+                if (!button) break;
+                const before = tableSignature();
+                sessionStorage.setItem(key, String(clicked + 1));
+                button.click();
+                clicked++;
+                if (!(await waitChange(before))) {
+                    finish({clicked: clicked, started: true, timedOut: true, error: false});
+                    return;
+                }
+            }
+            finish({clicked: clicked, started: clicked > 0, timedOut: false, error: false});
+        })().catch(() => finish({clicked: clicked, started: clicked > 0, timedOut: false, error: true}));
+    """
+    REWIND_PROGRESS_KEY = "crawler_rewind_clicked"
+
+    # 在一次脚本调用中完成翻页按钮的查找、no-data-btn检查、可见性检查、滚动和点击，
+    # 并带回点击前的表格文本。返回 {status: 'clicked' | 'no-data' | 'not-found', before: 点击前的表格文本}
+    CLICK_BUTTON_SCRIPT = IS_VISIBLE_JS + TABLE_SIGNATURE_JS + FIND_BUTTON_JS + """
+        const found = findButton(arguments[0], arguments[1]);
+        if (!found.el) return {status: found.status, before: null};
+        found.el.scrollIntoView(true);
+        const before = tableSignature();
+        found.el.click();
+        return {status: 'clicked', before: before};
+    """
+
     def __init__(self, edge_driver_path):
         """初始化Edge浏览器驱动"""
 
@@ -97,11 +230,12 @@ class GuangzhouWeatherCrawler:
         """提取汇总统计数据"""
         stats = {}
         try:
-            # 获取所有li元素
-            li_elements = self.driver.find_elements(By.CSS_SELECTOR, ".history-msg li")
+            # 一次性获取所有li元素的文本
+            li_texts = self.driver.execute_script(
+                "return Array.from(document.querySelectorAll('.history-msg li'), li => li.innerText || '');")
 
-            for li in li_elements:
-                text = li.text.strip()
+            for li_text in li_texts or []:
+                text = li_text.strip()
                 if not text:
                     continue
 
@@ -171,53 +305,31 @@ class GuangzhouWeatherCrawler:
         table_data = []
 
         try:
-            # 尝试不同的表格选择器
-            table_selectors = [
-                "table.history-table",
-                "table",
-                ".box-mod-tb table",
-                "tbody table"
-            ]
-
-            table = None
-            for selector in table_selectors:
-                try:
-                    tables = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for t in tables:
-                        if t.is_displayed():
-                            table = t
-                            break
-                    if table:
-                        break
-                except:
-                    continue
+            # 尝试不同的表格选择器，表格定位和单元格读取在一次脚本调用中完成
+            result = self.driver.execute_script(self.TABLE_TEXT_SCRIPT, list(self.TABLE_SELECTORS)) or {}
 
-            if not table:
+            if result.get('fallback'):
                 print("无法找到表格，尝试查找任何表格")
-                tables = self.driver.find_elements(By.TAG_NAME, "table")
-                if tables:
-                    table = tables[0]
 
-            if not table:
+            if result.get('rows') is None:
                 print("页面中没有找到任何表格")
                 return table_data
 
             # 获取所有行
-            rows = table.find_elements(By.TAG_NAME, "tr")
+            rows = result['rows']
 
             if len(rows) <= 1:
                 print(f"表格只有 {len(rows)} 行，可能没有数据")
                 return table_data
 
-            for i, row in enumerate(rows):
+            for i, cols in enumerate(rows):
                 # 跳过表头
                 if i == 0:
                     continue
 
-                cols = row.find_elements(By.TAG_NAME, "td")
                 if len(cols) >= 6:
                     # 提取日期
-                    date_text = cols[0].text.strip()
+                    date_text = cols[0].strip()
 
                     # 尝试从日期文本中提取YYYY-MM-DD格式
                     date_match = re.search(r'(\d{4}-\d{2}-\d{2})', date_text)
@@ -228,21 +340,21 @@ class GuangzhouWeatherCrawler:
                         date = date_text.split()[0] if date_text else ""
 
                     # 提取最高温
-                    high_temp = cols[1].text.strip()
+                    high_temp = cols[1].strip()
                     high_temp = re.sub(r'[^\d.-]', '', high_temp)  # 只保留数字和小数点
 
                     # 提取最低温
-                    low_temp = cols[2].text.strip()
+                    low_temp = cols[2].strip()
                     low_temp = re.sub(r'[^\d.-]', '', low_temp)  # 只保留数字和小数点
 
                     # 提取天气
-                    weather = cols[3].text.strip()
+                    weather = cols[3].strip()
 
                     # 提取风力风向
-                    wind = cols[4].text.strip()
+                    wind = cols[4].strip()
 
                     # 提取空气质量指数
-                    aqi_text = cols[5].text.strip()
+                    aqi_text = cols[5].strip()
                     aqi_match = re.search(r'(\d+)', aqi_text)
                     aqi = aqi_match.group(1) if aqi_match else aqi_text
 
@@ -264,32 +376,41 @@ class GuangzhouWeatherCrawler:
 
         return table_data
 
+    def table_changed(self, before):
+        """判断页面表格文本是否已不同于before"""
+        try:
+            return self.driver.execute_script(
+                self.TABLE_SIGNATURE_JS + self.TABLE_CHANGED_JS + "return tableChanged(arguments[0]);", before)
+        except WebDriverException:
+            return False
+
+    def wait_for_table_change(self, before):
+        """等待表格内容变化，代替固定时长的sleep，返回表格是否已更新"""
+        if before is None:
+            # 点击前没能读到表格文本，无法判断是否翻页成功，按点击失败处理
+            print("点击前未能读取表格内容")
+            return False
+
+        try:
+            WebDriverWait(self.driver, self.TABLE_CHANGE_TIMEOUT).until(
+                lambda d: self.table_changed(before))
+            return True
+        except TimeoutException:
+            print("等待表格更新超时")
+            return False
+
+    def click_month_button(self, selectors, check_no_data=False):
+        """在浏览器内查找并点击翻页按钮，返回 (状态, 点击前的表格文本)"""
+        result = self.driver.execute_script(self.CLICK_BUTTON_SCRIPT, list(selectors), check_no_data) or {}
+        return result.get('status'), result.get('before')
+
     def click_previous_month(self):
         """点击上一月按钮"""
         try:
-            # 查找上一月按钮
-            prev_button_selectors = [
-                "#js_prevMonth",
-                "a[onclick*='上一月']",
-                "a:contains('上一月')"
-            ]
-
-            for selector in prev_button_selectors:
-                try:
-                    prev_button = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    if prev_button.is_displayed() and prev_button.is_enabled():
-                        # 滚动到按钮位置
-                        self.driver.execute_script("arguments[0].scrollIntoView(true);", prev_button)
-                        time.sleep(0.5)
-
-                        # 点击按钮
-                        prev_button.click()
-
-                        # 等待页面加载
-                        time.sleep(2)
-                        return True
-                except:
-                    continue
+            status, before = self.click_month_button(self.PREV_BUTTON_SELECTORS)
+            if status == 'clicked':
+                # 等待表格内容更新，未更新时视为点击失败，避免重复爬取同一月
+                return self.wait_for_table_change(before)
 
             print("找不到上一月按钮")
             return False
@@ -301,36 +422,15 @@ class GuangzhouWeatherCrawler:
     def click_next_month(self):
         """点击下一月按钮"""
         try:
-            # 查找下一月按钮
-            next_button_selectors = [
-                "#js_nextMonth",
-                "a[onclick*='下一月']",
-                "a:contains('下一月')"
-            ]
-
-            for selector in next_button_selectors:
-                try:
-                    next_button = self.driver.find_element(By.CSS_SELECTOR, selector)
-
-                    # 检查按钮是否可用（没有no-data-btn类）
-                    class_name = next_button.get_attribute("class") or ""
-                    if "no-data-btn" in class_name:
-                        print("下一月按钮不可用（有no-data-btn类）")
-                        return False
+            # 检查按钮是否可用（没有no-data-btn类）并点击
+            status, before = self.click_month_button(self.NEXT_BUTTON_SELECTORS, check_no_data=True)
+            if status == 'no-data':
+                print("下一月按钮不可用（有no-data-btn类）")
+                return False
 
-                    if next_button.is_displayed() and next_button.is_enabled():
-                        # 滚动到按钮位置
-                        self.driver.execute_script("arguments[0].scrollIntoView(true);", next_button)
-                        time.sleep(0.5)
-
-                        # 点击按钮
-                        next_button.click()
-
-                        # 等待页面加载
-                        time.sleep(2)
-                        return True
-                except:
-                    continue
+            if status == 'clicked':
+                # 等待表格内容更新，未更新时视为点击失败，避免重复爬取同一月
+                return self.wait_for_table_change(before)
 
             print("找不到下一月按钮")
             return False
@@ -339,6 +439,61 @@ class GuangzhouWeatherCrawler:
             print(f"点击下一月按钮时出错: {e}")
             return False
 
+    def rewind_months(self, count, url):
+        """在浏览器内连续点击上一月按钮，返回 (已点击次数, 是否需要逐次点击补齐)"""
+        # 每次调用使用独立的key，避免读到上一个区域残留的点击次数
+        key = f"{self.REWIND_PROGRESS_KEY}_{time.time_ns()}"
+        previous_timeout = None
+        try:
+            previous_timeout = self.driver.timeouts.script
+            # 每步最多等待 TABLE_CHANGE_TIMEOUT 秒，留出余量
+            self.driver.set_script_timeout(count * (self.TABLE_CHANGE_TIMEOUT + 1) + 10)
+            result = self.driver.execute_async_script(
+                self.REWIND_SCRIPT, list(self.PREV_BUTTON_SELECTORS), count, key,
+                self.TABLE_CHANGE_TIMEOUT * 1000)
+            clicked = int(result['clicked'])
+        except Exception as e:
+            print(f"浏览器内点击上一月按钮时出错: {e}")
+            return self.read_rewind_progress(url, key), True
+        finally:
+            # 只有成功读取过原超时时间才恢复
+            if previous_timeout is not None:
+                try:
+                    self.driver.set_script_timeout(previous_timeout)
+                except WebDriverException:
+                    pass
+
+        if result.get('timedOut'):
+            print(f"第 {clicked} 次点击后表格未更新，停止回退")
+            return clicked, False
+        if result.get('error') or not result.get('started'):
+            return clicked, True
+        return clicked, False
+
+    def read_rewind_progress(self, url, key):
+        """读取浏览器内已完成的点击次数；无法确定时重新打开页面，从0开始"""
+        try:
+            # 先通知页面内的点击循环停止，读取次数后删除key
+            value = self.driver.execute_script(
+                "const key = arguments[0];"
+                "window[key + ':stop'] = true;"
+                "const value = sessionStorage.getItem(key);"
+                "sessionStorage.removeItem(key);"
+                "return value;",
+                key)
+            if value is not None:
+                return int(value)
+        except (WebDriverException, ValueError):
+            pass
+
+        print("无法确定已点击次数，重新打开页面")
+        try:
+            self.driver.get(url)
+            self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "table")))
+        except (WebDriverException, TimeoutException) as e:
+            print(f"重新打开页面失败: {e}")
+        return 0
+
     def crawl_region(self, region_name):
         """爬取单个区域的所有月份数据"""
         print(f"\n开始爬取 {region_name} 的数据...")
@@ -355,7 +510,10 @@ class GuangzhouWeatherCrawler:
         try:
             self.driver.get(url)
             print("页面加载中，请等待...")
-            time.sleep(5)
+            try:
+                self.wait.until(EC.presence_of_element_located((By.TAG_NAME, "table")))
+            except TimeoutException:
+                print("等待表格超时，继续尝试爬取")
 
         except Exception as e:
             print(f"访问页面失败: {e}")
@@ -363,12 +521,17 @@ class GuangzhouWeatherCrawler:
 
         # 第一步：点击上一月按钮23次，回到2024年1月
         print("点击上一月按钮23次，回到2024年1月...")
-        for i in range(23):
-            print(f"点击第 {i + 1} 次上一月按钮...")
-            if not self.click_previous_month():
-                print(f"第 {i + 1} 次点击失败，可能已到达最早月份")
-                break
-            time.sleep(1)
+        clicked, needs_fallback = self.rewind_months(23, url)
+        if needs_fallback:
+            print(f"浏览器内已点击 {clicked} 次，改为逐次点击剩余的 {23 - clicked} 次...")
+            for i in range(clicked, 23):
+                print(f"点击第 {i + 1} 次上一月按钮...")
+                if not self.click_previous_month():
+                    print(f"第 {i + 1} 次点击失败，可能已到达最早月份")
+                    break
+                time.sleep(1)
+        elif clicked < 23:
+            print(f"共点击 {clicked} 次上一月按钮，可能已到达最早月份")
 
         print("开始爬取数据...")
 